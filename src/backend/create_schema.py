@@ -0,0 +1,16 @@
+"""Crea las tablas que falten, una sola vez y fuera de los workers de uvicorn.
+
+Uso: poetry run python -m src.backend.create_schema
+"""
+import asyncio
+
+from src.backend.main import engine, create_schema
+
+
+async def main():
+    await create_schema()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,21 +1,31 @@
 from typing import Literal, Annotated
-from fastapi import FastAPI, Depends, HTTPException, status, Response, Request, Cookie
+from fastapi import FastAPI, Depends, HTTPException, status, Response, Request, Cookie, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel
-from sqlalchemy.ext.asyncio import create_async_engine,AsyncSession, AsyncAttrs
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy import Column, Integer, String, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncAttrs
+from sqlalchemy.orm import declarative_base
+from sqlalchemy import Column, Integer, String, Index, LargeBinary, DateTime, func, text
+from sqlalchemy.pool import NullPool, AsyncAdaptedQueuePool
+from sqlalchemy.exc import SQLAlchemyError
 import os
 from dotenv import load_dotenv
-from sqlalchemy import select
+from sqlalchemy import select, update, delete, lambda_stmt, bindparam
 from datetime import datetime, timedelta, timezone
 import uuid
-from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert as pg_insert
 import hmac
 import hashlib
+import asyncio
+import base64
+import json
+import time
+import asyncpg
+from cachetools import TTLCache
+from anyio import to_thread, CapacityLimiter
 
 load_dotenv()
 
@@ -31,14 +41,52 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL no definida")
 
+if not SECRET_KEY:
+    raise RuntimeError("SECRET_KEY no definida")
+
+#echo solo se activa con SQL_ECHO=1, ya que loguear cada sentencia bloquea el event loop.
+#Con DEPLOY_MODE=serverless no se mantiene un pool propio ni conexion LISTEN (se asume
+#PgBouncer delante); en cualquier otro caso se usa un pool dimensionado para un servidor.
+#
+#DB_MAX_CONNECTIONS es el total de conexiones de todos los workers (WEB_CONCURRENCY, el mismo
+#valor que usa uvicorn para --workers) y debe quedar bajo max_connections de PostgreSQL (100 por
+#defecto). Cada worker usa DB_MAX_CONNECTIONS // WEB_CONCURRENCY conexiones: una para el LISTEN
+#de revocaciones y el resto para el pool (un tercio fijas, el resto como overflow).
+#DB_POOL_SIZE y DB_MAX_OVERFLOW permiten fijar los valores a mano. Si el total no cabe en
+#DB_MAX_CONNECTIONS (minimo 3 conexiones por worker) el proceso no inicia.
+
+DEPLOY_MODE = os.getenv("DEPLOY_MODE", "server")
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "80"))
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+if DEPLOY_MODE == "serverless":
+    pool_options = {"poolclass": NullPool}
+else:
+    worker_connections = DB_MAX_CONNECTIONS // WEB_CONCURRENCY - 1
+    pool_size = int(os.getenv("DB_POOL_SIZE", max(1, worker_connections // 3)))
+    max_overflow = int(os.getenv("DB_MAX_OVERFLOW", max(0, worker_connections - pool_size)))
+    if WEB_CONCURRENCY * (pool_size + max_overflow + 1) > DB_MAX_CONNECTIONS or worker_connections < 2:
+        raise RuntimeError(
+            f"DB_MAX_CONNECTIONS={DB_MAX_CONNECTIONS} no alcanza para {WEB_CONCURRENCY} workers "
+            f"con pool_size={pool_size} y max_overflow={max_overflow} (mas 1 conexion LISTEN por worker)"
+        )
+    pool_options = {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": 5,
+        "pool_recycle": 1800,
+    }
+
 engine = create_async_engine(
     DATABASE_URL,
-    echo=True,
+    echo=os.getenv("SQL_ECHO") == "1",
+    pool_pre_ping=True,
+    **pool_options,
 )
 
-AsyncSessionLocal = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
+AsyncSessionLocal = async_sessionmaker(
+    engine,
     expire_on_commit=False,
 )
 
@@ -49,9 +97,16 @@ class Personas(Base, AsyncAttrs):
 
     rut = Column(String, unique=True, nullable = False, index=True)
     public_id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    nombre = Column(String,nullable = False,  index=True)
+    nombre = Column(String,nullable = False)
     apellido = Column(String,nullable = False, index=True)
-    id_religion = Column(String, nullable=False)
+    id_religion = Column(Integer, nullable=False)
+    rut_token = Column(String(16), nullable=False, index=True)
+
+    #indice que cubre el listado ordenado por nombre (index-only scan); tambien sirve para
+    #buscar por nombre, por eso la columna no tiene un indice propio.
+    __table_args__ = (
+        Index("ix_personas_nombre_covering", "nombre", "public_id", "rut_token", "apellido"),
+    )
     
 class Usuarios(Base, AsyncAttrs):
     __tablename__ = "usuarios"
@@ -60,10 +115,31 @@ class Usuarios(Base, AsyncAttrs):
     correo = Column(String, unique=True, nullable = False,  index=True)
     password = Column(String, nullable = False)
 
+class TokensRevocados(Base):
+    __tablename__ = "tokens_revocados"
+
+    firma = Column(LargeBinary(32), primary_key=True)
+    expira = Column(DateTime(timezone=True), nullable=False, index=True)
+
 async def get_session() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         yield session
 
+#consultas frecuentes como lambda_stmt: SQLAlchemy guarda en cache la construccion y compilacion,
+#y el valor del filtro se pasa como parametro.
+
+def _persona_by_public_id(public_id: uuid.UUID):
+    return lambda_stmt(lambda: select(Personas).where(Personas.public_id == public_id))
+
+def _usuario_by_correo(correo: str):
+    return lambda_stmt(lambda: select(Usuarios).where(Usuarios.correo == correo))
+
+def _usuario_activo(correo: str, firma: bytes):
+    return lambda_stmt(lambda: select(Usuarios).where(
+        Usuarios.correo == correo,
+        ~select(TokensRevocados.firma).where(TokensRevocados.firma == firma).exists(),
+    ))
+
 class PersonaCreate(BaseModel):
     rut: str
     nombre: str
@@ -76,6 +152,10 @@ class PersonasRead(BaseModel):
     nombre: str
     apellido: str
 
+class PersonasPage(BaseModel):
+    items: list[PersonasRead]
+    next_offset: int | None
+
 class PersonaUpdate(BaseModel):
     nombre: str
     apellido: str
@@ -92,6 +172,7 @@ app = FastAPI(
     openapi_url = "/openapi.json",
     docs_url = "/docs",
     redoc_url = "/redoc",
+    default_response_class = ORJSONResponse,
 )
 
 #esto es para evitar problemas de conexion en diferentes sistemas.
@@ -115,25 +196,64 @@ app.add_middleware(
 )
 
 def _map_persona_to_read_model(persona: Personas) -> PersonasRead:
-    """Helper para convertir un modelo de DB Personas a un modelo Pydantic PersonasRead."""
-    return PersonasRead(
+    """Helper para convertir un modelo de DB Personas a un modelo Pydantic PersonasRead.
+
+    Usa model_construct porque los datos vienen de nuestra propia tabla y ya tienen los tipos correctos.
+    """
+    return PersonasRead.model_construct(
         public_id=persona.public_id,
-        rut_token=create_rut_token(persona.rut),
+        rut_token=persona.rut_token,
         nombre=persona.nombre,
         apellido=persona.apellido,
     )
 
+#pads de HMAC-SHA256 calculados una sola vez, ya que TOKENIZATION_KEY no cambia. Los estados
+#de sha256 ya alimentados con cada pad se copian por llamada en vez de volver a procesar el pad.
+
+_HMAC_BLOCK_SIZE = hashlib.sha256().block_size
+_KEY_BLOCK = (
+    hashlib.sha256(TOKENIZATION_KEY).digest() if len(TOKENIZATION_KEY) > _HMAC_BLOCK_SIZE else TOKENIZATION_KEY
+).ljust(_HMAC_BLOCK_SIZE, b"\x00")
+_IPAD = bytes(b ^ 0x36 for b in _KEY_BLOCK)
+_OPAD = bytes(b ^ 0x5C for b in _KEY_BLOCK)
+_INNER_SHA256 = hashlib.sha256(_IPAD)
+_OUTER_SHA256 = hashlib.sha256(_OPAD)
+
 def create_rut_token(rut: str) -> str:
     """Creates a non-reversible, consistent token from a RUT for display purposes."""
-    return "rut-" + hmac.new(TOKENIZATION_KEY, rut.encode('utf-8'), hashlib.sha256).hexdigest()[:12]
+    inner = _INNER_SHA256.copy()
+    inner.update(rut.encode('utf-8'))
+    outer = _OUTER_SHA256.copy()
+    outer.update(inner.digest())
+    return "rut-" + outer.hexdigest()[:12]
 
 #codigo para tokenizacion de la contraseña.
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+#bcrypt corre en un hilo aparte para no bloquear el event loop; el limite de hilos se crea
+#en startup (2 por CPU), separado del limite por defecto que usan los endpoints sincronos.
+
+_bcrypt_limiter: CapacityLimiter | None = None
+
+#cache en memoria del resultado de bcrypt para logins repetidos; la clave es un blake2b,
+#asi no se guarda la contraseña en texto plano.
+
+_verify_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+_verify_cache_lock = asyncio.Lock()
+
+async def verify_password(plain_password, hashed_password):
+    key = hashlib.blake2b(plain_password.encode() + hashed_password.encode(), digest_size=16).digest()
+    async with _verify_cache_lock:
+        cached = _verify_cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = await to_thread.run_sync(pwd_context.verify, plain_password, hashed_password, limiter=_bcrypt_limiter)
+    async with _verify_cache_lock:
+        _verify_cache[key] = result
+    return result
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    return await to_thread.run_sync(pwd_context.hash, password, limiter=_bcrypt_limiter)
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
@@ -145,6 +265,139 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+#verificacion HS256 hecha a mano: get_current_user corre en cada request y jose.jwt.decode
+#es bastante mas lento. Los tokens se siguen emitiendo con jose en create_access_token.
+#_JWT_HMAC guarda la clave ya procesada; cada verificacion trabaja sobre una copia.
+
+_JWT_HMAC = hmac.new(SECRET_KEY.encode('utf-8'), digestmod=hashlib.sha256)
+
+def _b64url_decode(data: str) -> bytes:
+    """Decodifica un segmento base64url sin padding; rechaza cualquier forma no canonica.
+
+    Asi cada token tiene una sola representacion valida (por ejemplo, no se aceptan
+    variantes del ultimo caracter de la firma que decodifican a los mismos bytes).
+    """
+    if "=" in data:
+        raise ValueError("Segmento base64url con padding")
+    decoded = base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+    if base64.urlsafe_b64encode(decoded).rstrip(b"=").decode('ascii') != data:
+        raise ValueError("Segmento base64url no canonico")
+    return decoded
+
+def decode_access_token(token: str) -> dict:
+    """Verifica la firma y la expiracion de un JWT HS256 y retorna su payload."""
+    try:
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        signing_input = f"{header_b64}.{payload_b64}".encode('ascii')
+        mac = _JWT_HMAC.copy()
+        mac.update(signing_input)
+        expected = mac.digest()
+        if not hmac.compare_digest(_b64url_decode(signature_b64), expected):
+            raise JWTError("Firma invalida")
+
+        header = json.loads(_b64url_decode(header_b64))
+        payload = json.loads(_b64url_decode(payload_b64))
+    except ValueError as exc:
+        raise JWTError("Token mal formado") from exc
+
+    if not isinstance(header, dict) or header.get("alg") != ALGORITHM:
+        raise JWTError("Algoritmo no soportado")
+    if not isinstance(payload, dict):
+        raise JWTError("Token mal formado")
+
+    exp = payload.get("exp")
+    if not isinstance(exp, (int, float)) or exp <= time.time():
+        raise JWTError("Token expirado")
+    return payload
+
+#cache de usuarios autenticados, con la firma del token (ya verificada) como clave.
+#Las revocaciones de /logout se guardan en tokens_revocados y se avisan a todos los workers
+#con NOTIFY; cada worker mantiene una conexion LISTEN y solo usa la cache mientras esa
+#conexion esta activa. Si se cae, toda validacion vuelve a consultar la base de datos.
+#Con DEPLOY_MODE=serverless no se escucha (detras de PgBouncer en modo transaccion LISTEN
+#no recibe los NOTIFY de otras instancias), asi que la cache queda desactivada.
+
+_REVOCATION_CHANNEL = "tokens_revocados"
+_LISTENER_ERRORS = (OSError, asyncpg.PostgresError, asyncpg.InterfaceError, SQLAlchemyError)
+
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+_revoked_signatures: dict[bytes, float] = {}
+_revocation_listener: asyncpg.Connection | None = None
+_revocation_task: asyncio.Task | None = None
+
+def _bearer_token(access_token: str | None) -> str | None:
+    """Extrae el token de una cookie 'Bearer <token>'; None si el formato no es valido."""
+    if access_token is None:
+        return None
+    parts = access_token.split()
+    if len(parts) != 2 or parts[0].lower() != "bearer":
+        return None
+    return parts[1]
+
+def _token_signature(token: str) -> bytes:
+    """Bytes de la firma de un token ya aceptado por decode_access_token."""
+    return _b64url_decode(token.rpartition(".")[2])
+
+def _mark_revoked(firma: bytes, expira: float) -> None:
+    now = time.time()
+    for vencida in [key for key, exp in _revoked_signatures.items() if exp <= now]:
+        del _revoked_signatures[vencida]
+    _revoked_signatures[firma] = expira
+    _user_cache.pop(firma, None)
+
+def _on_revocation(connection, pid, channel, payload: str) -> None:
+    firma_hex, _, expira = payload.partition(":")
+    _mark_revoked(bytes.fromhex(firma_hex), float(expira))
+
+async def _load_revoked_tokens():
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            select(TokensRevocados.firma, TokensRevocados.expira).where(TokensRevocados.expira > func.now())
+        )
+        #las filas ya vienen filtradas por expira, no hace falta purgar en cada una.
+        _revoked_signatures.update((firma, expira.timestamp()) for firma, expira in result)
+
+async def _listen_revocations():
+    global _revocation_listener
+    dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+    while True:
+        try:
+            conn = await asyncpg.connect(dsn)
+        except _LISTENER_ERRORS:
+            await asyncio.sleep(5)
+            continue
+
+        closed = asyncio.Event()
+        conn.add_termination_listener(lambda _: closed.set())
+        try:
+            await conn.add_listener(_REVOCATION_CHANNEL, _on_revocation)
+            #se escucha antes de cargar la tabla para no perder revocaciones entre ambos pasos.
+            await _load_revoked_tokens()
+            _revocation_listener = conn
+            await closed.wait()
+        except _LISTENER_ERRORS:
+            pass
+        finally:
+            _revocation_listener = None
+            _user_cache.clear()
+            if not conn.is_closed():
+                await conn.close()
+        await asyncio.sleep(1)
+
+async def _revoke_token(session: AsyncSession, token: str, payload: dict) -> None:
+    firma = _token_signature(token)
+    expira = payload["exp"]
+    await session.execute(
+        pg_insert(TokensRevocados)
+        .values(firma=firma, expira=datetime.fromtimestamp(expira, timezone.utc))
+        .on_conflict_do_nothing()
+    )
+    await session.execute(delete(TokensRevocados).where(TokensRevocados.expira <= func.now()))
+    #pg_notify se entrega al hacer commit, junto con la fila insertada.
+    await session.execute(select(func.pg_notify(_REVOCATION_CHANNEL, f"{firma.hex()}:{expira}")))
+    await session.commit()
+    _mark_revoked(firma, expira)
+
 async def get_current_user(
     access_token: Annotated[str | None, Cookie()] = None,
     session: AsyncSession = Depends(get_session)
@@ -154,40 +407,59 @@ async def get_current_user(
         detail="No se pudieron validar las credenciales. Inicie sesión.",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    if access_token is None:
+    token = _bearer_token(access_token)
+    if token is None:
         raise credentials_exception
-    
-    try:
-        
-        parts = access_token.split()
-        if len(parts) != 2 or parts[0].lower() != "bearer":
-            raise credentials_exception
-        token = parts[1]
-    except Exception:
-        raise credentials_exception
-        
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         username: str | None = payload.get("sub")
         if username is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    
-    result = await session.execute(select(Usuarios).where(Usuarios.correo == username))
+
+    firma = _token_signature(token)
+    if firma in _revoked_signatures:
+        raise credentials_exception
+    use_cache = _revocation_listener is not None
+    if use_cache:
+        user = _user_cache.get(firma)
+        if user is not None:
+            return user
+
+    result = await session.execute(_usuario_activo(username, firma))
     user = result.scalar_one_or_none()
 
     if user is None:
         raise credentials_exception
+    if use_cache:
+        _user_cache[firma] = user
     return user
 
 CurrentUser = Annotated[Usuarios, Depends(get_current_user)]
 
-@app.on_event("startup")
-async def startup():
+#create_all solo corre con RUN_DDL=1; con varios workers el esquema se crea una vez
+#antes de levantarlos (python -m src.backend.create_schema).
+
+async def create_schema():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
+@app.on_event("startup")
+async def startup():
+    global _bcrypt_limiter, _revocation_task
+    _bcrypt_limiter = CapacityLimiter(2 * (os.cpu_count() or 1))
+    if os.getenv("RUN_DDL") == "1":
+        await create_schema()
+    if DEPLOY_MODE != "serverless":
+        _revocation_task = asyncio.create_task(_listen_revocations())
+
+@app.on_event("shutdown")
+async def shutdown():
+    if _revocation_task is not None:
+        _revocation_task.cancel()
+
 #end point usado para el uso de token
 
 @app.post("/token", tags=["Autenticación"])
@@ -196,10 +468,10 @@ async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     session: AsyncSession = Depends(get_session)
 ):
-    result = await session.execute(select(Usuarios).where(Usuarios.correo == form_data.username))
+    result = await session.execute(_usuario_by_correo(form_data.username))
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(form_data.password, user.password):
+    if not user or not await verify_password(form_data.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Correo o contraseña incorrectos",
@@ -221,7 +493,20 @@ async def login_for_access_token(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.post("/logout", tags=["Autenticación"])
-def logout(response: Response):
+async def logout(
+    response: Response,
+    access_token: Annotated[str | None, Cookie()] = None,
+    session: AsyncSession = Depends(get_session)
+):
+    #solo se revocan tokens validos; una cookie invalida solo se borra.
+    token = _bearer_token(access_token)
+    if token is not None:
+        try:
+            payload = decode_access_token(token)
+        except JWTError:
+            payload = None
+        if payload is not None:
+            await _revoke_token(session, token, payload)
     response.delete_cookie("access_token")
     return {"message": "Logout successful"}
 
@@ -231,41 +516,68 @@ async def create_persona(
     persona: PersonaCreate, 
     current_user: CurrentUser,
     session: AsyncSession = Depends(get_session)):
-    
-   
-    existing = await session.execute(select(Personas).where(Personas.rut == persona.rut))
-    if existing.scalar_one_or_none():
-        raise HTTPException(status_code=400, detail="El RUT ya está registrado.")
 
-   
-    hashed_religion = get_password_hash(str(persona.id_religion))
-    nueva = Personas(rut=persona.rut, nombre=persona.nombre, apellido=persona.apellido, id_religion=hashed_religion)
-    session.add(nueva)
+    #un solo INSERT ... ON CONFLICT: si el rut ya existe no retorna filas.
+    stmt = (
+        pg_insert(Personas)
+        .values(
+            rut=persona.rut,
+            rut_token=create_rut_token(persona.rut),
+            nombre=persona.nombre,
+            apellido=persona.apellido,
+            id_religion=persona.id_religion,
+        )
+        .on_conflict_do_nothing(index_elements=["rut"])
+        .returning(Personas)
+    )
+    result = await session.execute(stmt)
+    nueva = result.scalar_one_or_none()
+    if nueva is None:
+        raise HTTPException(status_code=400, detail="El RUT ya está registrado.")
     await session.commit()
-    await session.refresh(nueva)
 
     return _map_persona_to_read_model(nueva)
 
-@app.get("/personas/", response_model=list[PersonasRead])
+#el listado se consulta completo antes de responder (a lo mas 200 filas, un solo round trip)
+#y se serializa con un solo orjson.dumps. Es una consulta Core
+#fija (limit/offset como parametros) que retorna tuplas, sin instancias ORM; usa la misma
+#sesion que get_current_user para no tomar una segunda conexion del pool por request.
+
+_personas_table = Personas.__table__
+
+_PERSONAS_PAGE = (
+    select(
+        _personas_table.c.public_id,
+        _personas_table.c.rut_token,
+        _personas_table.c.nombre,
+        _personas_table.c.apellido,
+    )
+    .order_by(_personas_table.c.nombre, _personas_table.c.public_id)
+    .limit(bindparam("limit", type_=Integer))
+    .offset(bindparam("offset", type_=Integer))
+)
+
+@app.get("/personas/", response_model=PersonasPage)
 async def read_persona(
     current_user: CurrentUser,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
     session: AsyncSession = Depends(get_session)):
-    result = await session.execute(
-        select(Personas).order_by(Personas.nombre)
-    )
-    personas_db = result.scalars().all()
-    
-    response_list = [_map_persona_to_read_model(p) for p in personas_db]
-    return response_list
+    result = await session.execute(_PERSONAS_PAGE, {"limit": limit, "offset": offset})
+    rows = result.all()
+    items = [
+        {"public_id": public_id, "rut_token": rut_token, "nombre": nombre, "apellido": apellido}
+        for public_id, rut_token, nombre, apellido in rows
+    ]
+    next_offset = offset + limit if len(rows) == limit else None
+    return ORJSONResponse({"items": items, "next_offset": next_offset})
 
 @app.get("/personas/{public_id}", response_model=PersonasRead)
 async def read_single_persona(
     public_id: uuid.UUID, 
     current_user: CurrentUser,
     session: AsyncSession = Depends(get_session)):
-    result = await session.execute(
-        select(Personas).where(Personas.public_id == public_id)
-    )
+    result = await session.execute(_persona_by_public_id(public_id))
     persona = result.scalar_one_or_none()
     if persona is None:
         raise HTTPException(status_code=404, detail="Persona no encontrada")
@@ -279,21 +591,22 @@ async def update_persona(
     current_user: CurrentUser,
     session: AsyncSession = Depends(get_session)
 ):
-    result = await session.execute(
-        select(Personas).where(Personas.public_id == public_id)
+    stmt = (
+        update(Personas)
+        .where(Personas.public_id == public_id)
+        .values(
+            nombre=persona_update.nombre,
+            apellido=persona_update.apellido,
+            id_religion=persona_update.id_religion,
+        )
+        .returning(Personas)
     )
+    result = await session.execute(stmt)
     persona = result.scalar_one_or_none()
     if persona is None:
         raise HTTPException(status_code=404, detail="Persona no encontrada")
-    
-   
-    hashed_religion = get_password_hash(str(persona_update.id_religion))
-    persona.nombre = persona_update.nombre
-    persona.apellido = persona_update.apellido
-    persona.id_religion = hashed_religion
-    
+
     await session.commit()
-    await session.refresh(persona)
     return _map_persona_to_read_model(persona)
 
 @app.delete("/personas/{public_id}", status_code=204)
@@ -303,26 +616,27 @@ async def delete_persona(
     session: AsyncSession = Depends(get_session)
 ):
     result = await session.execute(
-        select(Personas).where(Personas.public_id == public_id)
+        delete(Personas).where(Personas.public_id == public_id).returning(Personas.public_id)
     )
-    persona = result.scalar_one_or_none()
-    if persona is None:
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="Persona no encontrada")
-    await session.delete(persona)
     await session.commit()
 
 
 @app.post("/users/", response_model=UsuariosRead, status_code=status.HTTP_201_CREATED, tags=["Users"])
 async def create_user(correo: str, password: str, session: AsyncSession = Depends(get_session)):
-    result = await session.execute(select(Usuarios).where(Usuarios.correo == correo))
-    if result.scalar_one_or_none():
+    hashed_password = await get_password_hash(password)
+    stmt = (
+        pg_insert(Usuarios)
+        .values(correo=correo, password=hashed_password)
+        .on_conflict_do_nothing(index_elements=["correo"])
+        .returning(Usuarios)
+    )
+    result = await session.execute(stmt)
+    db_user = result.scalar_one_or_none()
+    if db_user is None:
         raise HTTPException(status_code=400, detail="El correo ya está registrado")
-
-    hashed_password = get_password_hash(password)
-    db_user = Usuarios(correo=correo, password=hashed_password)
-    session.add(db_user)
     await session.commit()
-    await session.refresh(db_user)
     return db_user
 
 #Estado del servidor
@@ -0,0 +1,100 @@
+"""Migracion unica para bases de datos creadas antes de los cambios de esquema de personas.
+
+- id_religion pasa de hash bcrypt (VARCHAR) a INTEGER; el valor original se recupera
+  probando los ids de religion conocidos contra cada hash.
+- agrega la columna rut_token y la rellena en las filas existentes.
+- crea el indice que cubre el listado de personas (ix_personas_nombre_covering) y borra
+  ix_personas_nombre, que queda redundante.
+
+Se puede ejecutar mas de una vez: cada paso revisa si ya fue aplicado.
+
+Uso: poetry run python -m src.backend.migrate
+"""
+import asyncio
+
+from sqlalchemy import text
+
+from src.backend.main import engine, create_rut_token, pwd_context
+
+#ids del formulario (1-4) primero, luego el resto por si se guardaron otros valores.
+_RELIGION_IDS = [1, 2, 3, 4] + [i for i in range(100) if i not in (1, 2, 3, 4)]
+
+
+def _recover_religion_id(value: str) -> int:
+    if value.isdigit():
+        return int(value)
+    for religion_id in _RELIGION_IDS:
+        if pwd_context.verify(str(religion_id), value):
+            return religion_id
+    raise RuntimeError(f"No se pudo recuperar id_religion desde el hash {value!r}")
+
+
+async def migrate_id_religion(conn) -> int:
+    result = await conn.execute(text(
+        "SELECT data_type FROM information_schema.columns "
+        "WHERE table_name = 'personas' AND column_name = 'id_religion'"
+    ))
+    data_type = result.scalar_one_or_none()
+    if data_type is None or data_type == "integer":
+        return 0
+
+    result = await conn.execute(text("SELECT public_id, id_religion FROM personas"))
+    rows = result.all()
+    if rows:
+        valores = await asyncio.to_thread(
+            lambda: [
+                {"public_id": public_id, "id_religion": str(_recover_religion_id(hashed))}
+                for public_id, hashed in rows
+            ]
+        )
+        await conn.execute(
+            text("UPDATE personas SET id_religion = :id_religion WHERE public_id = :public_id"),
+            valores,
+        )
+    await conn.execute(text(
+        "ALTER TABLE personas ALTER COLUMN id_religion TYPE INTEGER USING id_religion::integer"
+    ))
+    return len(rows)
+
+
+async def migrate_rut_token(conn) -> int:
+    await conn.execute(text("ALTER TABLE personas ADD COLUMN IF NOT EXISTS rut_token VARCHAR(16)"))
+
+    result = await conn.execute(text("SELECT public_id, rut FROM personas WHERE rut_token IS NULL"))
+    rows = result.all()
+    if rows:
+        await conn.execute(
+            text("UPDATE personas SET rut_token = :rut_token WHERE public_id = :public_id"),
+            [{"public_id": public_id, "rut_token": create_rut_token(rut)} for public_id, rut in rows],
+        )
+
+    await conn.execute(text("ALTER TABLE personas ALTER COLUMN rut_token SET NOT NULL"))
+    await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_personas_rut_token ON personas (rut_token)"))
+    return len(rows)
+
+
+async def create_indexes(conn):
+    await conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_personas_nombre_covering "
+        "ON personas (nombre, public_id, rut_token, apellido)"
+    ))
+    await conn.execute(text("DROP INDEX IF EXISTS ix_personas_nombre"))
+
+
+async def main():
+    async with engine.begin() as conn:
+        result = await conn.execute(text("SELECT to_regclass('personas')"))
+        if result.scalar_one() is None:
+            print("La tabla personas no existe; create_schema la crea con el esquema actual.")
+            await engine.dispose()
+            return
+        religiones = await migrate_id_religion(conn)
+        tokens = await migrate_rut_token(conn)
+        await create_indexes(conn)
+    await engine.dispose()
+    print(f"id_religion convertido en {religiones} filas")
+    print(f"rut_token rellenado en {tokens} filas")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from datetime import timedelta
+
+import pytest
+from jose import JWTError, jwt
+
+from src.backend.main import ALGORITHM, SECRET_KEY, create_access_token, decode_access_token
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _sign_raw(header: bytes, payload: bytes) -> str:
+    signing_input = f"{_b64(header)}.{_b64(payload)}"
+    signature = hmac.new(SECRET_KEY.encode(), signing_input.encode(), hashlib.sha256).digest()
+    return f"{signing_input}.{_b64(signature)}"
+
+
+def _sign(header: dict, payload: dict) -> str:
+    return _sign_raw(json.dumps(header).encode(), json.dumps(payload).encode())
+
+
+def _jose_decode(token: str):
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
+
+def _our_decode(token: str):
+    try:
+        return decode_access_token(token)
+    except JWTError:
+        return None
+
+
+def _valid_token() -> str:
+    return create_access_token({"sub": "user@example.com"}, expires_delta=timedelta(minutes=5))
+
+
+def _tamper_payload(token: str) -> str:
+    header_b64, _, signature_b64 = token.split(".")
+    payload = _b64(json.dumps({"sub": "admin@example.com", "exp": int(time.time()) + 300}).encode())
+    return f"{header_b64}.{payload}.{signature_b64}"
+
+
+CASES = {
+    "valid": _valid_token,
+    "expired": lambda: create_access_token({"sub": "user@example.com"}, expires_delta=timedelta(seconds=-10)),
+    "tampered_payload": lambda: _tamper_payload(_valid_token()),
+    "wrong_key": lambda: jwt.encode({"sub": "user@example.com", "exp": int(time.time()) + 300}, "otra-clave", algorithm=ALGORITHM),
+    "wrong_alg_hs512": lambda: jwt.encode({"sub": "user@example.com", "exp": int(time.time()) + 300}, SECRET_KEY, algorithm="HS512"),
+    "alg_none": lambda: _sign({"alg": "none", "typ": "JWT"}, {"sub": "user@example.com", "exp": int(time.time()) + 300}),
+    "missing_exp": lambda: jwt.encode({"sub": "user@example.com"}, SECRET_KEY, algorithm=ALGORITHM),
+    "two_segments": lambda: ".".join(_valid_token().split(".")[:2]),
+    "four_segments": lambda: _valid_token() + ".abc",
+    "empty": lambda: "",
+    "garbage": lambda: "no-es-un-token",
+    "non_json_payload": lambda: _sign_raw(b'{"alg":"HS256","typ":"JWT"}', b"no json"),
+}
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_decode_access_token_matches_jose(case):
+    token = CASES[case]()
+    expected = _jose_decode(token)
+    if case == "missing_exp":
+        #jose acepta tokens sin exp; nosotros siempre los emitimos con exp y lo exigimos.
+        assert expected is not None
+        assert _our_decode(token) is None
+        return
+    assert _our_decode(token) == expected
+
+
+def test_decode_access_token_accepts_valid_token():
+    payload = decode_access_token(_valid_token())
+    assert payload["sub"] == "user@example.com"
+
+
+@pytest.mark.parametrize("padding", ["=", "=="])
+def test_decode_access_token_rejects_padding(padding):
+    token = _valid_token()
+    with pytest.raises(JWTError):
+        decode_access_token(token + padding)
+
+
+def test_decode_access_token_rejects_non_canonical_signature():
+    token = _valid_token()
+    signing_input, signature_b64 = token.rsplit(".", 1)
+    signature = base64.urlsafe_b64decode(signature_b64 + "=")
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+    variants = [signature_b64[:-1] + c for c in alphabet if c != signature_b64[-1]]
+    same_bytes = [v for v in variants if base64.urlsafe_b64decode(v + "=") == signature]
+    assert same_bytes
+    for variant in same_bytes:
+        with pytest.raises(JWTError):
+            decode_access_token(f"{signing_input}.{variant}")
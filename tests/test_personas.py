@@ -0,0 +1,53 @@
+import asyncio
+import json
+import uuid
+
+from src.backend.main import PersonasPage, read_persona
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.params = None
+
+    async def execute(self, statement, params=None):
+        self.params = params
+        return FakeResult(self.rows)
+
+
+def _read(rows, limit, offset):
+    session = FakeSession(rows)
+    response = asyncio.run(read_persona(current_user=None, limit=limit, offset=offset, session=session))
+    return session, json.loads(response.body)
+
+
+def test_read_persona_full_page_matches_response_model():
+    rows = [
+        (uuid.uuid4(), "rut-0123456789ab", "Ana", "Rojas"),
+        (uuid.uuid4(), "rut-ba9876543210", "Ñuño", "Pérez"),
+    ]
+    session, body = _read(rows, limit=2, offset=4)
+
+    assert session.params == {"limit": 2, "offset": 4}
+    page = PersonasPage.model_validate(body)
+    assert page.next_offset == 6
+    assert [(p.public_id, p.rut_token, p.nombre, p.apellido) for p in page.items] == rows
+
+
+def test_read_persona_last_page_has_no_next_offset():
+    rows = [(uuid.uuid4(), "rut-0123456789ab", "Ana", "Rojas")]
+    _, body = _read(rows, limit=50, offset=0)
+    assert body["next_offset"] is None
+
+
+def test_read_persona_empty():
+    _, body = _read([], limit=50, offset=0)
+    assert body == {"items": [], "next_offset": None}
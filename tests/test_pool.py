@@ -0,0 +1,41 @@
+import importlib
+
+import pytest
+
+import src.backend.main as main
+
+
+@pytest.fixture
+def reload_main(monkeypatch):
+    """Recarga main con otras variables de entorno; al terminar vuelve a la configuracion original."""
+    def load(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return importlib.reload(main)
+
+    yield load
+    monkeypatch.undo()
+    importlib.reload(main)
+
+
+@pytest.mark.parametrize("workers", ["1", "4", "8", "26"])
+def test_pool_fits_connection_budget(reload_main, workers):
+    module = reload_main(WEB_CONCURRENCY=workers, DB_MAX_CONNECTIONS="80")
+    pool = module.engine.pool
+    total = int(workers) * (pool.size() + pool._max_overflow + 1)
+    assert total <= 80
+
+
+def test_startup_fails_when_budget_is_too_small(reload_main):
+    with pytest.raises(RuntimeError, match="DB_MAX_CONNECTIONS"):
+        reload_main(WEB_CONCURRENCY="64", DB_MAX_CONNECTIONS="80")
+
+
+def test_explicit_pool_size_over_budget_fails(reload_main):
+    with pytest.raises(RuntimeError, match="DB_MAX_CONNECTIONS"):
+        reload_main(WEB_CONCURRENCY="4", DB_MAX_CONNECTIONS="80", DB_POOL_SIZE="20", DB_MAX_OVERFLOW="40")
+
+
+def test_serverless_uses_null_pool(reload_main):
+    module = reload_main(DEPLOY_MODE="serverless", WEB_CONCURRENCY="64")
+    assert isinstance(module.engine.pool, module.NullPool)
@@ -0,0 +1,205 @@
+import asyncio
+from datetime import timedelta
+
+import asyncpg
+import pytest
+from fastapi import HTTPException, Response
+
+import src.backend.main as main
+
+
+class FakeResult:
+    def __init__(self, value):
+        self._value = value
+
+    def scalar_one_or_none(self):
+        return self._value
+
+
+class FakeSession:
+    """Sesion minima: cuenta las consultas y responde siempre con el mismo usuario."""
+
+    def __init__(self, user):
+        self.user = user
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        self.statements.append(statement)
+        return FakeResult(self.user)
+
+    async def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture(autouse=True)
+def clean_state(monkeypatch):
+    monkeypatch.setattr(main, "_user_cache", main.TTLCache(maxsize=100, ttl=300))
+    monkeypatch.setattr(main, "_revoked_signatures", {})
+    monkeypatch.setattr(main, "_revocation_listener", None)
+
+
+@pytest.fixture
+def listener_up(monkeypatch):
+    monkeypatch.setattr(main, "_revocation_listener", object())
+
+
+def _cookie() -> str:
+    token = main.create_access_token({"sub": "user@example.com"}, expires_delta=timedelta(minutes=5))
+    return f"Bearer {token}"
+
+
+def _current_user(cookie, session):
+    return asyncio.run(main.get_current_user(access_token=cookie, session=session))
+
+
+def _logout(cookie, session):
+    return asyncio.run(main.logout(response=Response(), access_token=cookie, session=session))
+
+
+def test_cache_hit_skips_database(listener_up):
+    session = FakeSession(user="usuario")
+    cookie = _cookie()
+
+    assert _current_user(cookie, session) == "usuario"
+    assert _current_user(cookie, session) == "usuario"
+    assert len(session.statements) == 1
+
+
+def test_cache_miss_for_a_different_token(listener_up):
+    session = FakeSession(user="usuario")
+
+    _current_user(_cookie(), session)
+    _current_user(f"Bearer {main.create_access_token({'sub': 'user@example.com'}, timedelta(minutes=6))}", session)
+    assert len(session.statements) == 2
+
+
+def test_no_cache_while_listener_is_down():
+    session = FakeSession(user="usuario")
+    cookie = _cookie()
+
+    _current_user(cookie, session)
+    _current_user(cookie, session)
+    assert len(session.statements) == 2
+    assert len(main._user_cache) == 0
+
+
+def test_revoked_or_unknown_user_in_database_is_rejected(listener_up):
+    #_usuario_activo no retorna filas si el token esta en tokens_revocados.
+    with pytest.raises(HTTPException) as exc:
+        _current_user(_cookie(), FakeSession(user=None))
+    assert exc.value.status_code == 401
+
+
+def test_logout_revokes_token(listener_up):
+    session = FakeSession(user="usuario")
+    cookie = _cookie()
+    _current_user(cookie, session)
+
+    _logout(cookie, session)
+    assert session.commits == 1
+    assert main._token_signature(cookie.split()[1]) in main._revoked_signatures
+    assert len(main._user_cache) == 0
+
+    with pytest.raises(HTTPException) as exc:
+        _current_user(cookie, session)
+    assert exc.value.status_code == 401
+
+
+@pytest.mark.parametrize("cookie", [None, " ", "Bearer", "Bearer no-es-un-token", "Basic abc"])
+def test_logout_ignores_invalid_cookies(cookie):
+    session = FakeSession(user="usuario")
+
+    assert _logout(cookie, session) == {"message": "Logout successful"}
+    assert session.statements == []
+    assert main._revoked_signatures == {}
+
+
+def test_notification_revokes_cached_user(listener_up):
+    session = FakeSession(user="usuario")
+    cookie = _cookie()
+    token = cookie.split()[1]
+    _current_user(cookie, session)
+
+    payload = main.decode_access_token(token)
+    main._on_revocation(None, 0, main._REVOCATION_CHANNEL, f"{main._token_signature(token).hex()}:{payload['exp']}")
+
+    assert len(main._user_cache) == 0
+    with pytest.raises(HTTPException):
+        _current_user(cookie, session)
+
+
+def test_serverless_does_not_start_listener(monkeypatch):
+    monkeypatch.setattr(main, "DEPLOY_MODE", "serverless")
+    monkeypatch.setattr(main, "_revocation_task", None)
+    monkeypatch.setattr(main, "_bcrypt_limiter", None)
+    monkeypatch.delenv("RUN_DDL", raising=False)
+
+    asyncio.run(main.startup())
+    assert main._revocation_task is None
+
+
+class FakeListenerConnection:
+    def __init__(self):
+        self.listeners = {}
+        self.termination_listeners = []
+        self.closed = False
+
+    def add_termination_listener(self, callback):
+        self.termination_listeners.append(callback)
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+    def terminate(self):
+        self.closed = True
+        for callback in self.termination_listeners:
+            callback(self)
+
+
+def test_listener_retries_interface_errors_and_disables_cache_when_closed(monkeypatch):
+    connection = FakeListenerConnection()
+    attempts = []
+
+    async def fake_connect(dsn):
+        attempts.append(dsn)
+        if len(attempts) < 3:
+            raise asyncpg.InterfaceError("conexion rechazada")
+        return connection
+
+    async def fake_load():
+        pass
+
+    real_sleep = asyncio.sleep
+
+    async def fast_sleep(delay):
+        await real_sleep(0)
+
+    monkeypatch.setattr(main.asyncpg, "connect", fake_connect)
+    monkeypatch.setattr(main, "_load_revoked_tokens", fake_load)
+    monkeypatch.setattr(main.asyncio, "sleep", fast_sleep)
+
+    async def scenario():
+        task = asyncio.create_task(main._listen_revocations())
+        while main._revocation_listener is None:
+            await real_sleep(0)
+        assert len(attempts) == 3
+        assert main._REVOCATION_CHANNEL in connection.listeners
+
+        main._user_cache[b"firma"] = "usuario"
+        connection.terminate()
+        await real_sleep(0)
+        assert main._revocation_listener is None
+        assert len(main._user_cache) == 0
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
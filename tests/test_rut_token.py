@@ -0,0 +1,31 @@
+import hashlib
+import hmac
+import importlib
+
+import pytest
+
+import src.backend.main as main
+
+
+@pytest.fixture
+def main_with_key(monkeypatch):
+    """Recarga main con otro TOKENIZATION_KEY; al terminar vuelve a cargar la clave original."""
+    def load(key: str):
+        monkeypatch.setenv("TOKENIZATION_KEY", key)
+        return importlib.reload(main)
+
+    yield load
+    monkeypatch.undo()
+    importlib.reload(main)
+
+
+@pytest.mark.parametrize("key", ["default_token_key", "k" * 64, "x" * 65, "y" * 200])
+@pytest.mark.parametrize("rut", ["12345678-9", "1-K", "", "ñandú"])
+def test_create_rut_token_matches_hmac(main_with_key, key, rut):
+    module = main_with_key(key)
+    expected = "rut-" + hmac.new(key.encode("utf-8"), rut.encode("utf-8"), hashlib.sha256).hexdigest()[:12]
+    assert module.create_rut_token(rut) == expected
+
+
+def test_create_rut_token_is_stable_across_calls():
+    assert main.create_rut_token("12345678-9") == main.create_rut_token("12345678-9")